@@ -0,0 +1,220 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa  # type: ignore[import]
+import pytest
+
+from xap import layout
+
+
+@pytest.fixture
+def dataset(monkeypatch):
+    """Dataset over a synthetic bids2table table"""
+    func_meta = {'RepetitionTime': 2.0, 'EchoTime': [0.01, 0.02]}
+    fmap_meta = {'RepetitionTime': 1.5, 'EchoTime': [0.01], 'Extra': {'key': 'val'}}
+    table = pd.DataFrame(
+        {
+            'ds__dataset_description': [{'Name': 'Test', 'BIDSVersion': '1.8.0'}] * 4,
+            'ent__sub': ['01', '01', '02', '03'],
+            'ent__task': [np.nan, 'rest', 'rest', 'rest'],
+            'ent__run': [np.nan, 1.0, 1.0, 2.0],
+            'ent__datatype': ['anat', 'func', 'func', 'func'],
+            'ent__suffix': ['T1w', 'bold', 'bold', 'bold'],
+            'ent__ext': ['.nii.gz'] * 4,
+            'ent__extra_entities': [{}] * 4,
+            'meta__json': [
+                None,
+                {**func_meta, 'IntendedFor': 'x'},
+                {**func_meta, 'IntendedFor': ['x', 'y']},
+                fmap_meta,
+            ],
+            'file__file_path': [
+                '/data/sub-01/anat/sub-01_T1w.nii.gz',
+                '/data/sub-01/func/sub-01_task-rest_run-1_bold.nii.gz',
+                '/data/sub-02/func/sub-02_task-rest_run-1_bold.nii.gz',
+                '/data/sub-03/func/sub-03_task-rest_run-2_bold.nii.gz',
+            ],
+        }
+    )
+    monkeypatch.setattr(layout, 'bids2table', lambda _root, **_kwargs: table)
+    return layout.BIDSDataset('/data')
+
+
+@pytest.fixture
+def arrow_dataset(monkeypatch):
+    """Dataset over a synthetic table with Arrow-backed columns"""
+
+    def arrow(values, type_=None):
+        return pd.array(values, dtype=pd.ArrowDtype(type_ or pa.string()))
+
+    # Dictionary-encoded, with a separate dictionary per chunk
+    sub = pa.chunked_array(
+        [
+            pa.array(['01', '02']).dictionary_encode(),
+            pa.array(['02', '03']).dictionary_encode(),
+        ]
+    )
+    table = pd.DataFrame(
+        {
+            'ds__dataset_description': [{'Name': 'Test', 'BIDSVersion': '1.8.0'}] * 4,
+            'ent__sub': pd.arrays.ArrowExtensionArray(sub),
+            'ent__run': arrow([None, 1, 2, None], pa.int64()),
+            'ent__datatype': arrow(['anat', 'func', 'func', 'anat']),
+            'ent__suffix': arrow(['T1w', 'bold', 'bold', 'T1w']),
+            'ent__ext': arrow(['.nii.gz'] * 4),
+            'meta__json': [None] * 4,
+            'file__file_path': arrow(
+                [
+                    '/data/sub-01/anat/sub-01_T1w.nii.gz',
+                    '/data/sub-02/func/sub-02_run-1_bold.nii.gz',
+                    '/data/sub-02/func/sub-02_run-2_bold.nii.gz',
+                    '/data/sub-03/anat/sub-03_T1w.nii.gz',
+                ]
+            ),
+        }
+    )
+    monkeypatch.setattr(layout, 'bids2table', lambda _root, **_kwargs: table)
+    return layout.BIDSDataset('/data')
+
+
+@pytest.mark.parametrize(
+    ('values', 'dtype', 'target'),
+    [
+        (['a', None, 'b'], 'string', 'a'),
+        (['a', None, 'b'], pd.ArrowDtype(pa.string()), 'a'),
+        ([1, None, 2], 'Int64', 1),
+    ],
+)
+def test_query_nullable(dataset, values, dtype, target):
+    table = pd.DataFrame({'x': pd.array(values, dtype=dtype)}, index=['a', 'b', 'c'])
+    assert dataset._query(table, x=target) == ['a']
+    assert dataset._query(table, x=[target]) == ['a']
+    assert dataset._query(table, x=layout.bt.REQUIRED) == ['a', 'c']
+    assert dataset._query(table, x=layout.bt.NONE) == ['b']
+
+
+def test_get_none(dataset):
+    # Files without a run entity have NaN in the run column
+    assert dataset.get(run=layout.bt.NONE) == ['/data/sub-01/anat/sub-01_T1w.nii.gz']
+    assert dataset.get(suffix='bold', run=layout.bt.NONE) == []
+
+
+def test_get_mixed_list_metadata(dataset):
+    # IntendedFor holds a string in one sidecar and a list in another.
+    # List cells must equal a list query, scalar cells must be contained in it.
+    assert dataset.get(IntendedFor=['x', 'y']) == [
+        '/data/sub-01/func/sub-01_task-rest_run-1_bold.nii.gz',
+        '/data/sub-02/func/sub-02_task-rest_run-1_bold.nii.gz',
+    ]
+    assert dataset.get(IntendedFor=['x', 'z']) == ['/data/sub-01/func/sub-01_task-rest_run-1_bold.nii.gz']
+    assert dataset.get(IntendedFor=['x', ['x', 'y']]) == ['/data/sub-01/func/sub-01_task-rest_run-1_bold.nii.gz']
+    assert dataset.get(IntendedFor='x') == ['/data/sub-01/func/sub-01_task-rest_run-1_bold.nii.gz']
+
+
+def test_from_row(dataset):
+    for index, row in dataset.table.iterrows():
+        from_row = layout.BIDSFile.from_row(row, dataset)
+        lazy = dataset.files[index]
+        assert from_row.path_str == lazy.path_str
+        assert from_row.entities == lazy.entities
+        assert (from_row.datatype, from_row.suffix, from_row.extension) == (lazy.datatype, lazy.suffix, lazy.extension)
+
+
+def test_indexed_view_cache_bounded(dataset, monkeypatch):
+    monkeypatch.setattr(layout, '_MAX_INDEXED_VIEWS', 2)
+    subject = dataset._indexed_view('subject')
+    dataset._indexed_view('run')
+    assert dataset._indexed_view('subject') is subject
+    dataset._indexed_view('task')
+    assert list(dataset._indexed_views) == ['subject', 'task']
+
+
+def test_get_unhashable_column(dataset):
+    # JSON objects cannot be indexed, so fall back to _query and remember that
+    assert dataset.get(Extra='val') == []
+    assert dataset._inverted_indices['Extra'] is None
+    assert dataset.get(Extra='val') == []
+
+
+def test_get_list_of_values(dataset):
+    assert dataset.get(subject=['01', '03']) == [
+        '/data/sub-01/anat/sub-01_T1w.nii.gz',
+        '/data/sub-01/func/sub-01_task-rest_run-1_bold.nii.gz',
+        '/data/sub-03/func/sub-03_task-rest_run-2_bold.nii.gz',
+    ]
+    assert dataset.get(subject=['04']) == []
+
+
+def test_get_list_valued_metadata(dataset):
+    assert dataset.get(EchoTime=[0.01, 0.02]) == [
+        '/data/sub-01/func/sub-01_task-rest_run-1_bold.nii.gz',
+        '/data/sub-02/func/sub-02_task-rest_run-1_bold.nii.gz',
+    ]
+    assert dataset.get(EchoTime=[0.01]) == ['/data/sub-03/func/sub-03_task-rest_run-2_bold.nii.gz']
+
+
+def test_file_metadata(dataset):
+    anat, bold = dataset.files[0], dataset.files[3]
+    assert anat.metadata is None
+    assert bold.metadata == {'RepetitionTime': 1.5, 'EchoTime': [0.01], 'Extra': {'key': 'val'}}
+
+    with pytest.raises(ValueError):
+        _ = layout.BIDSFile('/data/sub-01/anat/sub-01_T1w.nii.gz').metadata
+
+
+@pytest.mark.parametrize(
+    'filters',
+    [
+        {'subject': '01'},
+        {'subject': '01', 'run': 1},
+        {'suffix': 'bold', 'run': layout.bt.PaddedInt('01')},
+        {'RepetitionTime': 2.0},
+        {'task': 'rest', 'RepetitionTime': 1.5},
+        {'subject': '04'},
+    ],
+)
+def test_get_fast_path(dataset, filters):
+    assert dataset.get(**filters) == dataset._query(dataset.query_table, **filters)
+    assert all(key in dataset._inverted_indices for key in filters)
+
+
+def test_list_valued_on_demand(dataset):
+    dataset.get(subject='01')
+    assert dataset._list_valued == {}
+    dataset.get(EchoTime=[0.01])
+    assert dataset._list_valued == {'EchoTime': True}
+
+
+def test_arrow_files(arrow_dataset):
+    files = arrow_dataset.files
+    assert [f.entities for f in files] == [
+        {'sub': '01'},
+        {'sub': '02', 'run': 1},
+        {'sub': '02', 'run': 2},
+        {'sub': '03'},
+    ]
+    assert files[1].path_str == '/data/sub-02/func/sub-02_run-1_bold.nii.gz'
+    assert (files[1].datatype, files[1].suffix, files[1].extension) == ('func', 'bold', '.nii.gz')
+
+
+def test_arrow_unique_values(arrow_dataset):
+    assert arrow_dataset.subjects == ['01', '02', '03']
+    assert arrow_dataset.datatypes == ['anat', 'func']
+
+
+def test_files_sequence(dataset):
+    files = dataset.files
+    assert len(files) == 4
+    assert files[-1] is files[3]
+    assert files[1] is files[1]
+    assert files[1:3] == [files[1], files[2]]
+    with pytest.raises(IndexError):
+        _ = files[4]
+    with pytest.raises(IndexError):
+        _ = files[-5]
+
+    # Iteration reuses files already created by indexing
+    first = files[0]
+    listed = list(files)
+    assert listed[0] is first
+    assert [f.path_str for f in listed] == list(dataset.table['file__file_path'])
+    assert listed[2] is files[2]
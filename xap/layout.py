@@ -4,7 +4,10 @@ import typing as ty
 from functools import cached_property
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa  # type: ignore[import]
+import pyarrow.compute as pc  # type: ignore[import]
 from bids2table import bids2table
 
 import bidsschematools as bst  # type: ignore[import]
@@ -47,9 +50,70 @@ class Schema:
     def meta(self) -> bst.types.Namespace:
         return self.schema.meta
 
+    @cached_property
+    def entity_rename_map(self) -> ty.Dict[str, str]:
+        """Map from bids2table ``ent__<name>`` columns to entity keys"""
+        return {f"ent__{self.objects.entities[key].name}": key for key in self.objects.entities}
+
 
 default_schema = Schema()
 
+# Table columns that are not exposed for querying
+_UNQUERIED_COLUMNS = re.compile(r'(ds|file|meta)__|ent__extra')
+# ent__ columns that do not hold entities in the BIDS filename sense
+_RESERVED_ENT = frozenset(('datatype', 'suffix', 'ext', 'extra_entities'))
+
+
+def _column_values(column: pd.Series) -> ty.Union[ty.List[ty.Any], np.ndarray]:
+    """Bulk-convert a table column to an array of Python objects
+
+    Arrow-backed columns are converted by pyarrow in a single pass,
+    instead of boxing each element through pandas.
+    """
+    if isinstance(column.dtype, pd.ArrowDtype):
+        return column.array.__arrow_array__().to_pylist()
+    return column.to_numpy()
+
+
+def _unique_values(column: pd.Series) -> ty.List[ty.Any]:
+    """Unique values of a table column, in order of appearance
+
+    For dictionary-encoded Arrow columns, pyarrow works on the integer codes
+    rather than decoding every element first.
+    """
+    if isinstance(column.dtype, pd.ArrowDtype) and pa.types.is_dictionary(column.dtype.pyarrow_dtype):
+        return pc.unique(column.array.__arrow_array__()).to_pylist()
+    return column.unique().tolist()
+
+
+def _pack_entities(
+    ent_block: np.ndarray,
+    mask: np.ndarray,
+    names: ty.Sequence[str],
+) -> ty.List[ty.Dict[str, ty.Any]]:
+    """Build a dict of present entities for each row of an entity block
+
+    Entity columns are sparse, so this works column by column and visits
+    only the cells where ``mask`` is set.
+    """
+    entities: ty.List[ty.Dict[str, ty.Any]] = [{} for _ in range(len(ent_block))]
+    for j, name in enumerate(names):
+        rows = np.flatnonzero(mask[:, j])
+        for i, val in zip(rows.tolist(), ent_block[rows, j]):
+            entities[i][name] = val
+    return entities
+
+
+# Number of re-indexed copies of a query table to keep
+_MAX_INDEXED_VIEWS = 32
+
+_NO_ROWS = np.empty(0, dtype=np.intp)
+
+
+def _is_exact_value(val: ty.Any) -> bool:
+    """Whether a query value selects rows by equality to a single hashable value"""
+    return val is not None and not isinstance(val, (bt.Query, list)) and isinstance(val, ty.Hashable)
+
 
 class File(bt.File[Schema]):
     """Generic file holder
@@ -63,9 +127,18 @@ class File(bt.File[Schema]):
         path: ty.Union[os.PathLike, str],
         dataset: ty.Optional["BIDSDataset"] = None,
     ):
-        self.path = Path(path)
+        self.path_str = os.fspath(path)
         self.dataset = dataset
 
+    # The protocol declares a plain attribute; cached_property is still writable
+    @cached_property
+    def path(self) -> Path:  # type: ignore[override]
+        # Deferred, as many files are only ever used as strings
+        return Path(self.path_str)
+
+    def __fspath__(self) -> str:
+        return self.path_str
+
 
 class BIDSFile(File, bt.BIDSFile[Schema]):
     """BIDS file"""
@@ -93,7 +166,7 @@ class BIDSFile(File, bt.BIDSFile[Schema]):
         entities = {
             col[5:]: row[col]
             for col in row.dropna().index
-            if col.startswith('ent__') and col[5:] not in ('datatype', 'suffix', 'ext', 'extra_entities')
+            if col.startswith('ent__') and col[5:] not in _RESERVED_ENT
         }
         return cls(
             row['file__file_path'],
@@ -105,11 +178,97 @@ class BIDSFile(File, bt.BIDSFile[Schema]):
         )
 
     @cached_property
-    def metadata(self) -> dict[str, ty.Any]:
+    def metadata(self) -> ty.Optional[ty.Dict[str, ty.Any]]:
         """Sidecar metadata aggregated according to inheritance principle"""
         if not self.dataset:
             raise ValueError
-        return dataset.table['meta__json'][dataset.table['file__file_path'] == self.path].item()
+        return self.dataset._meta_by_path[self.path_str]
+
+
+class _LazyFileList(ty.Sequence[BIDSFile]):
+    """Files of a :class:`BIDSDataset`, constructed on first access
+
+    Nothing is extracted from the dataset table until a file is requested.
+    The columns needed to construct :class:`BIDSFile` objects are then held
+    as arrays, and each file is created when it is first indexed.
+    """
+
+    def __init__(self, dataset: "BIDSDataset"):
+        self._dataset = dataset
+        self._files: ty.Dict[int, BIDSFile] = {}
+
+    def __len__(self) -> int:
+        return len(self._dataset.table)
+
+    @cached_property
+    def _columns(self) -> ty.Tuple[ty.Union[ty.List[ty.Any], np.ndarray], ...]:
+        """Path, datatype, suffix and extension columns"""
+        table = self._dataset.table
+        return (
+            _column_values(table['file__file_path']),
+            _column_values(table['ent__datatype']),
+            _column_values(table['ent__suffix']),
+            _column_values(table['ent__ext']),
+        )
+
+    @cached_property
+    def _entities(self) -> ty.Tuple[ty.List[str], np.ndarray, np.ndarray]:
+        """Entity names, and the block of entity values with its not-NA mask"""
+        table = self._dataset.table
+        # The column schema is fixed, so find entity columns once and not per row
+        ent_cols = [col for col in table.columns if col.startswith('ent__') and col[5:] not in _RESERVED_ENT]
+        ent_block = np.empty((len(table), len(ent_cols)), dtype=object)
+        for j, col in enumerate(ent_cols):
+            ent_block[:, j] = _column_values(table[col])
+        return [col[5:] for col in ent_cols], ent_block, pd.notna(ent_block)
+
+    @ty.overload
+    def __getitem__(self, index: int) -> BIDSFile:
+        ...
+
+    @ty.overload
+    def __getitem__(self, index: slice) -> ty.List[BIDSFile]:
+        ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+
+        try:
+            return self._files[index]
+        except KeyError:
+            pass
+
+        ent_names, ent_block, ent_mask = self._entities
+        return self._make_file(
+            index,
+            {ent_names[j]: ent_block[index, j] for j in np.flatnonzero(ent_mask[index])},
+        )
+
+    def __iter__(self) -> ty.Iterator[BIDSFile]:
+        # Iteration needs every file, so pack all entities at once, column by column
+        if len(self._files) < len(self):
+            ent_names, ent_block, ent_mask = self._entities
+            for index, entities in enumerate(_pack_entities(ent_block, ent_mask, ent_names)):
+                if index not in self._files:
+                    self._make_file(index, entities)
+        return (self._files[index] for index in range(len(self)))
+
+    def _make_file(self, index: int, entities: ty.Dict[str, ty.Any]) -> BIDSFile:
+        paths, datatypes, suffixes, extensions = self._columns
+        file = self._files[index] = BIDSFile(
+            paths[index],
+            self._dataset,
+            entities=entities,
+            datatype=datatypes[index],
+            suffix=suffixes[index],
+            extension=extensions[index],
+        )
+        return file
 
 
 class BIDSDataset(bt.BIDSDataset[Schema]):
@@ -117,71 +276,171 @@ class BIDSDataset(bt.BIDSDataset[Schema]):
         self.schema = kwargs.pop('schema', default_schema)
         self.table = bids2table(root, **kwargs)
 
-        self.dataset_description = self.table['ds__dataset_description'][0]
-        self.files = [BIDSFile.from_row(row, self) for index, row in self.table.iterrows()]
-        self.datatypes = self.table.ent__datatype.unique().tolist()
-        self.subjects = self.table.ent__sub.unique().tolist()
+        self.dataset_description = self.table['ds__dataset_description'].iat[0]
+
+        self.files = _LazyFileList(self)
+
+        self.datatypes = _unique_values(self.table['ent__datatype'])
+        self.subjects = _unique_values(self.table['ent__sub'])
 
         self.ignored = []  # TODO
         self.modalities = []  # TODO
         self.entities = []  # TODO
 
+        self._indexed_views: ty.Dict[str, pd.DataFrame] = {}
+        self._inverted_indices: ty.Dict[str, ty.Optional[ty.Dict[ty.Any, np.ndarray]]] = {}
+        self._list_valued: ty.Dict[str, bool] = {}
+
+    @cached_property
+    def _meta_by_path(self) -> ty.Dict[str, ty.Optional[ty.Dict[str, ty.Any]]]:
+        """Sidecar metadata keyed by file path"""
+        return dict(zip(_column_values(self.table['file__file_path']), _column_values(self.table['meta__json'])))
+
     @cached_property
     def query_table(self):
         table = self.table.set_index('file__file_path')
         table['path'] = table.index
-        meta = pd.DataFrame([obj or {} for obj in table.meta__json], index=table.index)
-        filtered = table.iloc[:, ~table.columns.str.match(r'(ds|file|meta)__|ent__extra')].join(meta)
-        renamer = {f"ent__{self.schema.objects.entities[key].name}": key for key in self.schema.objects.entities}
-        renamer.update({
+        meta = pd.DataFrame([obj or {} for obj in _column_values(table['meta__json'])], index=table.index)
+        columns = table.columns.to_numpy()
+        keep = np.fromiter(
+            (not _UNQUERIED_COLUMNS.match(col) for col in columns),
+            dtype=bool,
+            count=len(columns),
+        )
+        filtered = table.iloc[:, keep].join(meta)
+        renamer = {
+            **self.schema.entity_rename_map,
             "ent__datatype": "datatype",
             "ent__suffix": "suffix",
             "ent__ext": "extension",
-        })
+        }
         return filtered.rename(columns=renamer).dropna(axis=1, how='all')
 
-    @staticmethod
-    def _query(table, **filters):
+    def _is_list_valued(self, column: str) -> bool:
+        """Whether ``column`` of :attr:`query_table` holds any lists
+
+        Some metadata fields, such as ``IntendedFor``, may be a single value or a list,
+        so every value is checked, once per column. Columns with no lists can be
+        filtered with :meth:`pandas.Series.isin`.
+        """
+        try:
+            return self._list_valued[column]
+        except KeyError:
+            pass
+
+        table = self.query_table
+        list_valued = self._list_valued[column] = (
+            column in table
+            and table[column].dtype == object
+            and any(isinstance(val, list) for val in table[column].to_numpy())
+        )
+        return list_valued
+
+    def _query(self, table, **filters):
+        # Narrow a single row mask, rather than re-slicing the table for each filter
+        mask = np.ones(len(table), dtype=bool)
         for key, val in filters.items():
             if val in (None, bt.NONE):
-                # TODO: Handle nan
-                table = table[~table[key].astype(bool)]
+                col = table[key].to_numpy()
+                # Missing values count as absent, so only test the truthiness of present values
+                rows = np.flatnonzero(mask & pd.notna(col))
+                mask[rows] = ~col[rows].astype(bool)
                 continue
             elif val == bt.REQUIRED:
-                table = table.dropna(subset=key)
-                table = table[table[key].astype(bool)]
+                col = table[key].to_numpy()
+                mask &= pd.notna(col)
+                rows = np.flatnonzero(mask)
+                mask[rows] = col[rows].astype(bool)
                 continue
             elif val == bt.OPTIONAL:
                 continue
-            elif key not in table or len(table) == 0:
+            elif key not in table or not mask.any():
                 return []
 
-            table = table.dropna(subset=key)
+            col = table[key].to_numpy()
+            # Missing values must not be compared: comparisons to pd.NA return pd.NA, which
+            # cannot be coerced to bool, and isin() matches NaN. NumPy-typed columns can only
+            # be missing as NaN, which never compares equal, so need no mask for equality.
+            if col.dtype == object or isinstance(val, list):
+                mask &= pd.notna(col)
+            # Only compare rows that are still selected
+            rows = np.flatnonzero(mask)
+            if not isinstance(val, list):
+                mask[rows] = col[rows] == val
             # Check contains if values are list and target column is not
-            if isinstance(val, list) and pd.Series.any(table[key].apply(type) != list):
-                table = table[table[key] in val]
+            elif not self._is_list_valued(key):
+                mask[rows] = table[key].iloc[rows].isin(val).to_numpy(dtype=bool)
             else:
-                table = table[table[key] == val]
-
-        return table.index.unique().to_list()
+                # Columns may mix lists and scalars (e.g. IntendedFor), so decide per cell:
+                # list cells must equal the query, scalar cells must be contained in it.
+                # Lists are unhashable and NumPy would broadcast them, so check one by one.
+                mask[rows] = np.fromiter(
+                    (obj == val if isinstance(obj, list) else obj in val for obj in col[rows]),
+                    dtype=bool,
+                    count=len(rows),
+                )
+
+        return table.index[mask].unique().to_list()
+
+    def _inverted_index(self, column: str) -> ty.Optional[ty.Dict[ty.Any, np.ndarray]]:
+        """Positions of the rows of :attr:`query_table` holding each value of ``column``
+
+        ``None`` if the column holds unhashable values, such as JSON objects.
+        """
+        try:
+            return self._inverted_indices[column]
+        except KeyError:
+            pass
+
+        try:
+            index = self.query_table.groupby(column, sort=False).indices
+        except TypeError:
+            index = None
+        self._inverted_indices[column] = index
+        return index
 
     def get(self, **filters):
         # Quick optimization
         if not filters:
             return self.table['file__file_path'].to_list()
 
-        return self._query(self.query_table, **filters)
+        table = self.query_table
+        # Exact matches can be looked up in inverted indices, unless a column
+        # holds unhashable values such as lists
+        if all(_is_exact_value(val) and key in table for key, val in filters.items()):
+            indices = [self._inverted_index(key) for key in filters]
+            if all(index is not None for index in indices):
+                rows = None
+                for index, val in zip(indices, filters.values()):
+                    matches = index.get(val, _NO_ROWS)
+                    rows = matches if rows is None else np.intersect1d(rows, matches, assume_unique=True)
+                return table.index.to_numpy()[rows].tolist()
+
+        return self._query(table, **filters)
+
+    def _indexed_view(self, column: str) -> pd.DataFrame:
+        """:attr:`query_table` indexed by ``column``
+
+        Each view copies the table, so only the most recently used views are kept.
+        """
+        views = self._indexed_views
+        try:
+            # Re-insert to mark as most recently used
+            view = views[column] = views.pop(column)
+        except KeyError:
+            view = views[column] = self.query_table.set_index(column)
+            if len(views) > _MAX_INDEXED_VIEWS:
+                del views[next(iter(views))]
+        return view
 
     def get_entities(self, entity: str, **filters):
-        table = self.query_table
-        if entity not in table:
+        if entity not in self.query_table:
             return []
 
-        return self._query(table.set_index(entity), **filters)
+        return self._query(self._indexed_view(entity), **filters)
 
     def get_metadata(self, term: str, **filters):
-        table = self.query_table
-        if term not in table:
+        if term not in self.query_table:
             return []
 
-        return self._query(table.set_index(term), **filters)
+        return self._query(self._indexed_view(term), **filters)
@@ -1,7 +1,7 @@
 """PyBIDS 1.0 API specification"""
 
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Protocol, TypeVar, Union
+from typing import Any, Dict, List, Optional, Protocol, Sequence, TypeVar, Union
 
 from .utils import PaddedInt
 
@@ -59,7 +59,7 @@ class BIDSFile(File[SchemaT], Protocol):
     extension: Optional[str]
 
     @property
-    def metadata(self) -> Dict[str, Any]:
+    def metadata(self) -> Optional[Dict[str, Any]]:
         """Sidecar metadata aggregated according to inheritance principle"""
 
 
@@ -79,7 +79,7 @@ class BIDSDataset(Protocol[SchemaT]):
     ignored: List[File[SchemaT]]
     """Invalid files found in dataset"""
 
-    files: List[BIDSFile[SchemaT]]
+    files: Sequence[BIDSFile[SchemaT]]
     """Valid files found in dataset"""
 
     datatypes: List[str]